@@ -1,8 +1,14 @@
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 from bot import Bot
 from type.poker_action import PokerAction
 from type.round_state import RoundStateClient
+import atexit
+import os
+import pickle
 import random
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+from functools import lru_cache
+from itertools import combinations
 
 # ======================================================
 # CARD UTILITIES
@@ -10,49 +16,317 @@ import random
 
 RANKS = '23456789TJQKA'
 SUITS = 'shdc'
+PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
 
+# Cactus-Kev card encoding:
+#   bits 16-28 rank bitmask | bits 12-15 suit bit | bits 8-11 rank | bits 0-7 prime
+CARD_INT: Dict[str, int] = {
+    r + s: (1 << (16 + i)) | (1 << (12 + j)) | (i << 8) | PRIMES[i]
+    for i, r in enumerate(RANKS)
+    for j, s in enumerate(SUITS)
+}
 
-def build_deck(excluded: List[str]) -> List[str]:
-    """Return a deck excluding known cards."""
-    return [r + s for r in RANKS for s in SUITS if r + s not in excluded]
+# Rank masks of the ten straights, best (broadway) to worst (wheel)
+STRAIGHTS = [0x1F << i for i in range(8, -1, -1)] + [0x100F]
 
+DECK = list(CARD_INT.values())
 
-def hand_score(cards: List[str]) -> Tuple:
+
+def build_deck(excluded: List[int]) -> List[int]:
+    """Return a deck of encoded cards excluding known cards."""
+    excluded = set(excluded)
+    return [c for c in DECK if c not in excluded]
+
+
+def _build_tables() -> Tuple[List[int], Dict[int, int]]:
+    """
+    Build the 5-card lookup tables. Ranks run from 1 (royal flush)
+    to 7462 (7-5-4-3-2 offsuit); lower is better.
+    """
+    flush = [0] * 8192
+    unsuited = {}
+
+    def product(ranks):
+        p = 1
+        for r in ranks:
+            p *= PRIMES[r]
+        return p
+
+    # Distinct-rank masks ordered best to worst, straights excluded
+    high_cards = sorted(
+        (m for m in range(8192)
+         if bin(m).count('1') == 5 and m not in STRAIGHTS),
+        reverse=True
+    )
+    desc = range(12, -1, -1)
+
+    for i, m in enumerate(STRAIGHTS):
+        flush[m] = 1 + i
+        unsuited[product(r for r in range(13) if m >> r & 1)] = 1600 + i
+    for i, m in enumerate(high_cards):
+        flush[m] = 323 + i
+        unsuited[product(r for r in range(13) if m >> r & 1)] = 6186 + i
+
+    rank = 11
+    for q in desc:                                   # four of a kind
+        for k in desc:
+            if k != q:
+                unsuited[product((q, q, q, q, k))] = rank
+                rank += 1
+    for t in desc:                                   # full house
+        for p in desc:
+            if p != t:
+                unsuited[product((t, t, t, p, p))] = rank
+                rank += 1
+
+    rank = 1610
+    for t in desc:                                   # three of a kind
+        for k1, k2 in combinations([r for r in desc if r != t], 2):
+            unsuited[product((t, t, t, k1, k2))] = rank
+            rank += 1
+    for p1, p2 in combinations(desc, 2):             # two pair
+        for k in desc:
+            if k != p1 and k != p2:
+                unsuited[product((p1, p1, p2, p2, k))] = rank
+                rank += 1
+    for p in desc:                                   # one pair
+        for kickers in combinations([r for r in desc if r != p], 3):
+            unsuited[product((p, p) + kickers)] = rank
+            rank += 1
+
+    return flush, unsuited
+
+
+FLUSH_TABLE, UNSUITED_TABLE = _build_tables()
+
+
+def _rank5(c1: int, c2: int, c3: int, c4: int, c5: int) -> int:
+    if c1 & c2 & c3 & c4 & c5 & 0xF000:
+        return FLUSH_TABLE[(c1 | c2 | c3 | c4 | c5) >> 16]
+    return UNSUITED_TABLE[
+        (c1 & 0xFF) * (c2 & 0xFF) * (c3 & 0xFF) * (c4 & 0xFF) * (c5 & 0xFF)
+    ]
+
+
+# Hits come from within a single decision (at most ~4000 evaluations
+# with three opponents), so a small bound is enough. Every pool worker
+# keeps its own copy of this cache.
+@lru_cache(maxsize=8192)
+def _hand_rank_sorted(cards: Tuple[int, ...]) -> int:
+    return min(_rank5(*combo) for combo in combinations(cards, 5))
+
+
+def hand_rank(cards: List[int]) -> int:
     """
-    Lightweight 7-card hand evaluator for Monte Carlo comparison.
-    Returns a tuple where higher is better.
+    Cactus-Kev evaluator for 5 to 7 encoded cards.
+    Returns the best 5-card rank; lower is better.
+    Results are memoized on the sorted cards, since the board is fixed
+    within a decision and the same hands recur across iterations.
     """
-    ranks = sorted([RANKS.index(c[0]) for c in cards], reverse=True)
-    suits = [c[1] for c in cards]
+    return _hand_rank_sorted(tuple(sorted(cards)))
 
-    rank_counts = {r: ranks.count(r) for r in set(ranks)}
-    counts = sorted(rank_counts.values(), reverse=True)
 
-    is_flush = max(suits.count(s) for s in set(suits)) >= 5
+# Worst rank of four of a kind; anything at or below is near the nuts
+QUADS_CUTOFF = 166
+WORST_RANK = 7462
 
-    unique = sorted(set(ranks), reverse=True)
-    is_straight = any(
-        unique[i] - unique[i + 4] == 4
-        for i in range(len(unique) - 4)
-    )
+# Sequential stopping: check every CHECK_EVERY iterations and stop once
+# the standard error of the equity estimate drops below MAX_STDERR.
+CHECK_EVERY = 100
+MAX_STDERR = 0.02
+
+
+def mc_equity(
+    hole: List[int],
+    board: List[int],
+    num_opponents: int,
+    iterations: int,
+    seed: Optional[int] = None
+) -> Tuple[float, int]:
+    """
+    Monte Carlo equity of encoded hole cards against random opponent
+    hands. Works on integer cards only so the loop stays free of
+    string handling. Stops early once the estimate is tight enough;
+    returns the equity and the number of iterations actually run.
+    """
+    # random() is a single C call; randrange() does rejection sampling
+    # in Python and costs roughly three times as much per draw.
+    rand = random.Random(seed).random
+    rank_of = hand_rank    # local alias for the inner loop
+    wins = ties = 0
+    known = hole + board
+    needed = 5 - len(board)
+    draw = 2 * num_opponents + needed
+
+    # Built once: a partial shuffle of any ordering of the deck is still
+    # uniform, so the previous iteration's ordering never needs undoing.
+    deck = build_deck(known)
+    n = len(deck)
+
+    played = 0
+    while played < iterations:
+        batch = min(CHECK_EVERY, iterations - played)
+
+        for _ in range(batch):
+            # Partial Fisher-Yates: only shuffle the cards actually dealt
+            for i in range(draw):
+                j = i + int(rand() * (n - i))
+                deck[i], deck[j] = deck[j], deck[i]
+
+            sim_board = board + deck[draw - needed:draw]
+            my_rank = rank_of(hole + sim_board)
+
+            # Running min over opponents; once one beats us the rest
+            # cannot change the outcome.
+            opp_best = WORST_RANK + 1
+            for k in range(0, 2 * num_opponents, 2):
+                rank = rank_of(deck[k:k + 2] + sim_board)
+                if rank < opp_best:
+                    opp_best = rank
+                    if rank < my_rank:
+                        break
+
+            if my_rank < opp_best:
+                wins += 1
+            elif my_rank == opp_best:
+                ties += 1
+
+        played += batch
+        p = (wins + 0.5 * ties) / played
+        if p * (1 - p) < MAX_STDERR * MAX_STDERR * played:
+            break
 
-    if is_straight and is_flush:
-        return (8, max(unique))
-    if counts[0] == 4:
-        return (7, )
-    if counts[0] == 3 and counts[1] >= 2:
-        return (6, )
-    if is_flush:
-        return (5, ranks)
-    if is_straight:
-        return (4, max(unique))
-    if counts[0] == 3:
-        return (3, )
-    if counts[0] == 2 and counts[1] == 2:
-        return (2, )
-    if counts[0] == 2:
-        return (1, )
-    return (0, ranks)
+    return (wins + 0.5 * ties) / played, played
+
+
+def river_equity(hole: List[int], board: List[int]) -> float:
+    """
+    Exact heads-up equity on a complete board, enumerating every
+    opponent holding instead of sampling.
+    """
+    wins = ties = 0
+    my_rank = hand_rank(hole + board)
+    opp_hands = list(combinations(build_deck(hole + board), 2))
+
+    for opp in opp_hands:
+        opp_rank = hand_rank(board + list(opp))
+        if my_rank < opp_rank:
+            wins += 1
+        elif my_rank == opp_rank:
+            ties += 1
+
+    return (wins + 0.5 * ties) / len(opp_hands)
+
+
+def hole_makes_nuts(hole: List[int], board: List[int]) -> bool:
+    """
+    True when the hole cards make four of a kind or a straight flush.
+    Quads or a straight flush lying entirely on the board do not count.
+    """
+    made = hand_rank(hole + board)
+    if made > QUADS_CUTOFF:
+        return False
+
+    board_ranks = [(c >> 8) & 0xF for c in board]
+    if any(board_ranks.count(r) == 4 for r in board_ranks):
+        return False
+    return len(board) < 5 or made < hand_rank(board)
+
+
+# ======================================================
+# PARALLEL MONTE CARLO
+# ======================================================
+
+# Smallest share of an equity call worth giving a worker; below this
+# the IPC round trips cost more than the simulation itself.
+MIN_CHUNK_ITERATIONS = 200
+
+# get_action's largest budget (1000 iterations) never splits into more
+# chunks than this, so any further workers would sit idle.
+MAX_WORKERS = 1000 // MIN_CHUNK_ITERATIONS
+
+# A killed worker breaks the pool; a module loaded under a name the
+# workers cannot import fails to pickle mc_equity.
+POOL_ERRORS = (BrokenExecutor, pickle.PicklingError, OSError)
+
+_pool = None
+_pool_failed = False
+
+
+def get_pool():
+    """Return the shared worker pool, or None if it is unavailable."""
+    global _pool
+    workers = min(os.cpu_count() or 1, MAX_WORKERS)
+    if _pool is None and workers > 1 and not _pool_failed:
+        try:
+            # Jobs reference mc_equity by module name; check that it
+            # pickles before forking anything.
+            pickle.dumps(mc_equity)
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            atexit.register(_pool.shutdown)
+            # Workers only fork on the first submit; pay for that here
+            # rather than inside the first decision.
+            _pool.submit(int).result()
+        except POOL_ERRORS:
+            disable_pool()
+    return _pool
+
+
+def disable_pool():
+    """Shut the pool down for good; equity runs in-process from then on."""
+    global _pool, _pool_failed
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+    _pool = None
+    _pool_failed = True
+
+
+def parallel_mc_equity(
+    hole: List[int],
+    board: List[int],
+    num_opponents: int,
+    iterations: int
+) -> float:
+    """
+    Run mc_equity on the worker pool in rounds of one CHECK_EVERY batch
+    per worker, applying the sequential stop to the combined total.
+    """
+    pool = get_pool()
+    workers = min(MAX_WORKERS, os.cpu_count() or 1,
+                  iterations // MIN_CHUNK_ITERATIONS)
+    if pool is None or workers <= 1:
+        return mc_equity(hole, board, num_opponents, iterations)[0]
+
+    # Independent seeds per chunk so workers never share a stream
+    seeder = random.SystemRandom()
+    score = 0.0
+    played = 0
+
+    try:
+        while played < iterations:
+            round_size = min(workers * CHECK_EVERY, iterations - played)
+            sizes = [CHECK_EVERY] * (round_size // CHECK_EVERY)
+            if round_size % CHECK_EVERY:
+                sizes.append(round_size % CHECK_EVERY)
+
+            futures = [
+                pool.submit(mc_equity, hole, board, num_opponents, size,
+                            seeder.getrandbits(64))
+                for size in sizes
+            ]
+            for f in futures:
+                eq, run = f.result()
+                score += eq * run
+                played += run
+
+            p = score / played
+            if p * (1 - p) < MAX_STDERR * MAX_STDERR * played:
+                break
+    except POOL_ERRORS:
+        disable_pool()
+        return mc_equity(hole, board, num_opponents, iterations)[0]
+
+    return score / played
 
 
 # ======================================================
@@ -63,11 +337,14 @@ class SimplePlayer(Bot):
     def __init__(self):
         super().__init__()
         self.hand = []
+        self.hand_codes = []
         self.current_chips = 0
         self.big_blind_amount = 10
         self.all_players = []
         self.position = 0
         self.game_count = 0
+        self._bet_key = None
+        get_pool()    # start workers now rather than on the first decision
 
     # --------------------------------------------------
     # GAME LIFECYCLE
@@ -83,6 +360,7 @@ class SimplePlayer(Bot):
         all_players: List[int]
     ):
         self.hand = player_hands
+        self.hand_codes = [CARD_INT[c] for c in player_hands]
         self.current_chips = starting_chips
         self.big_blind_amount = blind_amount
         self.all_players = all_players
@@ -91,6 +369,7 @@ class SimplePlayer(Bot):
     def on_round_start(self, round_state: RoundStateClient, remaining_chips: int):
         self.current_chips = remaining_chips
         self.position = self.calculate_position(round_state)
+        self._bet_key = self.resolve_bet_key(round_state)
 
     # --------------------------------------------------
     # POSITION & STACK
@@ -116,7 +395,17 @@ class SimplePlayer(Bot):
     # POT ODDS
     # --------------------------------------------------
 
+    def resolve_bet_key(self, round_state: RoundStateClient):
+        """Player bets may be keyed by int or str id; pick once per round."""
+        if self.id in round_state.player_bets:
+            return self.id
+        if str(self.id) in round_state.player_bets:
+            return str(self.id)
+        return None
+
     def get_my_bet(self, round_state: RoundStateClient) -> int:
+        if self._bet_key is not None:
+            return round_state.player_bets.get(self._bet_key, 0)
         return round_state.player_bets.get(self.id, 0) or \
                round_state.player_bets.get(str(self.id), 0)
 
@@ -132,36 +421,22 @@ class SimplePlayer(Bot):
 
     def monte_carlo_equity(
         self,
-        hole_cards: List[str],
-        board: List[str],
+        hole_cards: List[int],
+        board: List[int],
         iterations: int = 800
     ) -> float:
-        wins = ties = 0
         num_opponents = max(1, len(self.all_players) - 1)
 
-        known = hole_cards + board
-
-        for _ in range(iterations):
-            deck = build_deck(known)
-            random.shuffle(deck)
-
-            opponents = [
-                [deck.pop(), deck.pop()]
-                for _ in range(num_opponents)
-            ]
-
-            needed = 5 - len(board)
-            sim_board = board + [deck.pop() for _ in range(needed)]
-
-            my_score = hand_score(hole_cards + sim_board)
-            opp_best = max(hand_score(o + sim_board) for o in opponents)
+        if len(board) >= 3 and hole_makes_nuts(hole_cards, board):
+            return 0.98
 
-            if my_score > opp_best:
-                wins += 1
-            elif my_score == opp_best:
-                ties += 1
+        # Heads-up on the river there are only C(45, 2) = 990 outcomes.
+        # Enumerating them costs about twice an early-stopped sample,
+        # but gives exact equity where the budget allows 990 evaluations.
+        if num_opponents == 1 and len(board) == 5 and iterations >= 990:
+            return river_equity(hole_cards, board)
 
-        return (wins + 0.5 * ties) / iterations
+        return parallel_mc_equity(hole_cards, board, num_opponents, iterations)
 
     # --------------------------------------------------
     # MAIN DECISION
@@ -196,8 +471,8 @@ class SimplePlayer(Bot):
             return PokerAction.FOLD, 0
 
         equity = self.monte_carlo_equity(
-            self.hand,
-            board,
+            self.hand_codes,
+            [CARD_INT[c] for c in board],
             iterations=600 if stack in ["critical", "short"] else 1000
         )
 